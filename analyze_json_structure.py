@@ -6,141 +6,244 @@ Analyzes all ORPHApacket JSON files to identify all keys and nested keys present
 in the dataset, with frequency counts and examples.
 """
 
-import json
-import glob
+import csv
 import os
+import sys
 from collections import defaultdict, Counter
-import pandas as pd
+from operator import itemgetter
 
-def extract_keys_recursive(obj, path="", key_structure=None):
+from packet_scan import list_packets, loads, scan_packets
+
+intern = sys.intern
+
+def extract_keys_recursive(obj, path="", key_structure=None, samples=None):
     """
-    Recursively extract all keys and nested keys from a JSON object.
+    Extract all keys and nested keys from a JSON object.
+    
+    Walks the object with an explicit stack rather than recursion; paths
+    are carried as tuples of segments and only joined into a dotted
+    string when a key is counted.
     
     Args:
         obj: JSON object (dict, list, or primitive)
         path: Current path in the JSON structure
         key_structure: Dictionary to store key paths and their counts
+        samples: Optional dictionary filled with the string form of the
+            first primitive value seen under each key path
     
     Returns:
         dict: Key structure with paths and counts
     """
     if key_structure is None:
-        key_structure = defaultdict(int)
+        key_structure = {}
+    
+    # Bind the lookups once
+    get = key_structure.get
+    bump = key_structure.__setitem__
+    
+    # Entries are (value, path segments, whether the value sits under a dict key).
+    # Children are pushed in reverse so keys are visited in document order.
+    stack = [(obj, (path,) if path else (), False)]
+    while stack:
+        obj, parts, is_key = stack.pop()
+        if is_key:
+            key_path = '.'.join(parts)
+            count = get(key_path, 0)
+            if not count:
+                key_path = intern(key_path)
+                # The leaf value is already in hand; keep it as a sample
+                if samples is not None and not isinstance(obj, (dict, list)):
+                    samples[key_path] = str(obj)
+            bump(key_path, count + 1)
+        
+        if isinstance(obj, dict):
+            for key, value in reversed(obj.items()):
+                stack.append((value, parts + (key,), True))
+        
+        elif isinstance(obj, list):
+            if obj:  # Only analyze non-empty lists
+                # Analyze the structure of list items (sample first 3 items)
+                head = parts[:-1]
+                last = parts[-1] if parts else ""
+                for i in range(min(len(obj), 3) - 1, -1, -1):
+                    stack.append((obj[i], head + (f"{last}[{i}]",), False))
     
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            current_path = f"{path}.{key}" if path else key
-            key_structure[current_path] += 1
-            
-            # Recursively analyze nested structures
-            extract_keys_recursive(value, current_path, key_structure)
+    return key_structure
+
+def digest_packet(json_file, data):
+    """
+    Reduce one parsed JSON file to a small digest.
     
-    elif isinstance(obj, list):
-        if obj:  # Only analyze non-empty lists
-            # Analyze the structure of list items
-            for i, item in enumerate(obj[:3]):  # Sample first 3 items
-                list_path = f"{path}[{i}]" if i < 3 else f"{path}[...]"
-                extract_keys_recursive(item, list_path, key_structure)
+    Args:
+        json_file (str): Path to the JSON file
+        data: Parsed JSON document
     
-    return key_structure
+    Returns:
+        tuple: (basename, key paths, sample value or None for each key path)
+    """
+    # Extract key structure (and leaf samples) from this file
+    samples = {}
+    file_key_structure = extract_keys_recursive(data, samples=samples)
+    
+    key_paths = list(file_key_structure)
+    return os.path.basename(json_file), key_paths, [samples.get(k) for k in key_paths]
+
+def _process(json_file, buf):
+    """
+    Worker: parse one mapped JSON file and reduce it to a small digest.
+    
+    Args:
+        json_file (str): Path to the JSON file
+        buf (mmap.mmap): Read-only mapping of the file
+    
+    Returns:
+        tuple: See digest_packet
+    """
+    with memoryview(buf) as view:
+        data = loads(view)
+    return digest_packet(json_file, data)
+
+def new_structure_stats():
+    """
+    Create empty merge state for merge_digest.
+    
+    Per-path data lives in parallel lists indexed by a path id, so each
+    key path is hashed once per file.
+    
+    Returns:
+        dict: Merge state
+    """
+    return {
+        'path_ids': {},
+        'key_counts': [],
+        'sample_values': [],
+        'sample_seen': [],
+        'file_examples': [],
+    }
+
+def merge_digest(stats, digest):
+    """
+    Merge one file digest (see digest_packet) into the merge state.
+    
+    Args:
+        stats (dict): Merge state from new_structure_stats
+        digest (tuple): Digest of one file
+    """
+    path_ids = stats['path_ids']
+    key_counts = stats['key_counts']
+    sample_values = stats['sample_values']
+    sample_seen = stats['sample_seen']
+    file_examples = stats['file_examples']
+    basename, key_paths, samples = digest
+    
+    # Add to overall structure
+    for key_path, value in zip(key_paths, samples):
+        i = path_ids.get(key_path)
+        if i is None:
+            i = path_ids[key_path] = len(key_counts)
+            key_counts.append(0)
+            sample_values.append([])
+            sample_seen.append(set())
+            file_examples.append([])
+        key_counts[i] += 1
+        
+        # Store example file for this key path
+        examples = file_examples[i]
+        if len(examples) < 3:
+            examples.append(basename)
+        
+        # Store sample values for leaf keys (non-nested); the set mirrors
+        # the list so the duplicate check does not scan it
+        if value is not None:
+            values = sample_values[i]
+            if len(values) < 5:
+                seen = sample_seen[i]
+                if value not in seen:
+                    seen.add(value)
+                    values.append(value)
+
+def structure_results(stats, processed):
+    """
+    Build the analysis results from the merge state.
+    
+    Args:
+        stats (dict): Merge state from new_structure_stats
+        processed (int): Number of files merged
+    
+    Returns:
+        dict: Analysis results
+    """
+    path_ids = stats['path_ids']
+    return {
+        'key_structures': {p: stats['key_counts'][i] for p, i in path_ids.items()},
+        'sample_values': {p: stats['sample_values'][i] for p, i in path_ids.items()},
+        'file_examples': {p: stats['file_examples'][i] for p, i in path_ids.items()},
+        'total_files': processed
+    }
 
 def analyze_json_files(json_directory):
     """
     Analyze all JSON files in the directory to extract key structures.
     
+    Files are parsed in a process pool; each worker returns a small
+    per-file digest which is merged here.
+    
     Args:
         json_directory (str): Path to directory containing JSON files
         
     Returns:
         dict: Analysis results
     """
-    json_files = glob.glob(os.path.join(json_directory, "ORPHApacket_*.json"))
+    json_files = list_packets(json_directory)
     total_files = len(json_files)
     
     print(f"🔍 Analyzing JSON structure across {total_files:,} files...")
     
     # Collect all key structures
-    all_key_structures = defaultdict(int)
-    sample_values = defaultdict(list)
-    file_examples = defaultdict(list)
-    
+    stats = new_structure_stats()
     processed = 0
     
-    for json_file in json_files:
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Extract key structure from this file
-            file_key_structure = extract_keys_recursive(data)
-            
-            # Add to overall structure
-            for key_path, count in file_key_structure.items():
-                all_key_structures[key_path] += 1
-                
-                # Store example file for this key path
-                if len(file_examples[key_path]) < 3:
-                    file_examples[key_path].append(os.path.basename(json_file))
-                
-                # Store sample values for leaf keys (non-nested)
-                if len(sample_values[key_path]) < 5:
-                    try:
-                        # Navigate to the value using the key path
-                        current_obj = data
-                        path_parts = key_path.split('.')
-                        
-                        for part in path_parts:
-                            if '[' in part:  # Handle list indices
-                                key_name = part.split('[')[0]
-                                if key_name in current_obj and isinstance(current_obj[key_name], list):
-                                    if current_obj[key_name]:
-                                        current_obj = current_obj[key_name][0]
-                                    else:
-                                        break
-                            else:
-                                if part in current_obj:
-                                    current_obj = current_obj[part]
-                                else:
-                                    break
-                        
-                        # Store sample value if it's a primitive type
-                        if not isinstance(current_obj, (dict, list)):
-                            if str(current_obj) not in sample_values[key_path]:
-                                sample_values[key_path].append(str(current_obj))
-                    except:
-                        pass
-            
-            processed += 1
-            if processed % 1000 == 0:
-                print(f"Processed {processed:,}/{total_files:,} files...")
-                
-        except Exception as e:
-            print(f"Error processing {json_file}: {str(e)}")
-            continue
+    for digest in scan_packets(_process, json_files):
+        merge_digest(stats, digest)
+        
+        processed += 1
+        if processed % 1000 == 0:
+            print(f"Processed {processed:,}/{total_files:,} files...")
     
     print(f"✅ Analysis complete: {processed:,} files processed")
     
-    return {
-        'key_structures': dict(all_key_structures),
-        'sample_values': dict(sample_values),
-        'file_examples': dict(file_examples),
-        'total_files': processed
-    }
+    return structure_results(stats, processed)
 
-def generate_structure_report(analysis_results):
+def sort_key_structures(key_structures):
+    """
+    Sort key paths by frequency (most common first).
+    
+    Args:
+        key_structures (dict): Key path counts from analyze_json_files
+    
+    Returns:
+        list: (key_path, count) tuples
+    """
+    return sorted(key_structures.items(), key=itemgetter(1), reverse=True)
+
+def generate_structure_report(analysis_results, sorted_keys=None):
     """
     Generate a comprehensive report of the JSON structure analysis.
     
     Args:
         analysis_results (dict): Results from analyze_json_files
+        sorted_keys (list): Optional output of sort_key_structures, to
+            avoid sorting the key paths again
     """
     key_structures = analysis_results['key_structures']
     sample_values = analysis_results['sample_values']
     file_examples = analysis_results['file_examples']
     total_files = analysis_results['total_files']
+    inv_total = 100.0 / total_files if total_files else 0.0
     
     # Sort keys by frequency (most common first)
-    sorted_keys = sorted(key_structures.items(), key=lambda x: x[1], reverse=True)
+    if sorted_keys is None:
+        sorted_keys = sort_key_structures(key_structures)
     
     print(f"\n📊 JSON STRUCTURE ANALYSIS REPORT")
     print("=" * 80)
@@ -160,7 +263,7 @@ def generate_structure_report(analysis_results):
         print("-" * 60)
         
         for key_path, count in depth_groups[depth][:20]:  # Top 20 per level
-            percentage = (count / total_files) * 100
+            percentage = count * inv_total
             print(f"{key_path:<50} {count:>6,} ({percentage:>5.1f}%)")
             
             # Show sample values if available
@@ -177,62 +280,91 @@ def generate_structure_report(analysis_results):
     
     return sorted_keys
 
-def export_to_csv(analysis_results):
+def export_to_csv(analysis_results, sorted_keys=None):
     """
     Export the analysis results to CSV files.
     
     Args:
         analysis_results (dict): Results from analyze_json_files
+        sorted_keys (list): Optional output of sort_key_structures, to
+            avoid sorting the key paths again
     """
     key_structures = analysis_results['key_structures']
     sample_values = analysis_results['sample_values']
     file_examples = analysis_results['file_examples']
     total_files = analysis_results['total_files']
+    inv_total = 100.0 / total_files if total_files else 0.0
+    
+    # Rows are written in order of count (descending)
+    if sorted_keys is None:
+        sorted_keys = sort_key_structures(key_structures)
     
-    # Prepare data for CSV
-    csv_data = []
-    for key_path, count in key_structures.items():
-        percentage = (count / total_files) * 100
+    # Prepare rows for CSV as plain tuples
+    csv_rows = []
+    for key_path, count in sorted_keys:
+        percentage = count * inv_total
         depth = key_path.count('.')
         
-        csv_data.append({
-            'Key_Path': key_path,
-            'Count': count,
-            'Percentage': round(percentage, 2),
-            'Depth': depth,
-            'Sample_Values': '; '.join(sample_values.get(key_path, [])[:5]),
-            'Example_Files': '; '.join(file_examples.get(key_path, [])[:3])
-        })
-    
-    # Sort by count (descending)
-    csv_data.sort(key=lambda x: x['Count'], reverse=True)
+        csv_rows.append((
+            key_path,
+            count,
+            round(percentage, 2),
+            depth,
+            '; '.join(sample_values.get(key_path, [])[:5]),
+            '; '.join(file_examples.get(key_path, [])[:3])
+        ))
     
     # Export to CSV
-    df = pd.DataFrame(csv_data)
-    df.to_csv('json_structure_analysis.csv', index=False)
+    with open('json_structure_analysis.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['Key_Path', 'Count', 'Percentage', 'Depth', 'Sample_Values', 'Example_Files'])
+        writer.writerows(csv_rows)
     
     # Export summary by depth
     depth_summary = defaultdict(lambda: {'count': 0, 'keys': []})
-    for item in csv_data:
-        depth = item['Depth']
+    for key_path, _, _, depth, _, _ in csv_rows:
         depth_summary[depth]['count'] += 1
-        depth_summary[depth]['keys'].append(item['Key_Path'])
-    
-    summary_data = []
-    for depth in sorted(depth_summary.keys()):
-        summary_data.append({
-            'Depth_Level': depth,
-            'Number_of_Keys': depth_summary[depth]['count'],
-            'Sample_Keys': '; '.join(depth_summary[depth]['keys'][:5])
-        })
-    
-    summary_df = pd.DataFrame(summary_data)
-    summary_df.to_csv('json_structure_summary.csv', index=False)
+        depth_summary[depth]['keys'].append(key_path)
+    
+    with open('json_structure_summary.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['Depth_Level', 'Number_of_Keys', 'Sample_Keys'])
+        for depth in sorted(depth_summary.keys()):
+            writer.writerow((
+                depth,
+                depth_summary[depth]['count'],
+                '; '.join(depth_summary[depth]['keys'][:5])
+            ))
     
     print("📁 Files exported:")
     print("   - json_structure_analysis.csv (detailed key analysis)")
     print("   - json_structure_summary.csv (summary by depth)")
 
+def write_structure_outputs(analysis_results):
+    """
+    Print the structure report, export the CSV files and print the top 10.
+    
+    Args:
+        analysis_results (dict): Results from analyze_json_files
+    """
+    # Sort key paths once for both the report and the CSV export
+    sorted_keys = sort_key_structures(analysis_results['key_structures'])
+    
+    # Generate report
+    generate_structure_report(analysis_results, sorted_keys)
+    
+    # Export to CSV
+    export_to_csv(analysis_results, sorted_keys)
+    
+    # Print top-level summary
+    print(f"\n🎯 TOP 10 MOST COMMON KEY PATHS:")
+    print("-" * 50)
+    total_files = analysis_results['total_files']
+    inv_total = 100.0 / total_files if total_files else 0.0
+    for i, (key_path, count) in enumerate(sorted_keys[:10], 1):
+        percentage = count * inv_total
+        print(f"{i:2d}. {key_path:<40} {count:>6,} ({percentage:>5.1f}%)")
+
 def main():
     """Main function to run the JSON structure analysis."""
     print("🔍 JSON STRUCTURE ANALYZER")
@@ -247,18 +379,8 @@ def main():
     # Analyze JSON structure
     analysis_results = analyze_json_files(json_directory)
     
-    # Generate report
-    sorted_keys = generate_structure_report(analysis_results)
-    
-    # Export to CSV
-    export_to_csv(analysis_results)
-    
-    # Print top-level summary
-    print(f"\n🎯 TOP 10 MOST COMMON KEY PATHS:")
-    print("-" * 50)
-    for i, (key_path, count) in enumerate(sorted_keys[:10], 1):
-        percentage = (count / analysis_results['total_files']) * 100
-        print(f"{i:2d}. {key_path:<40} {count:>6,} ({percentage:>5.1f}%)")
+    # Report and export
+    write_structure_outputs(analysis_results)
 
 if __name__ == "__main__":
     main()
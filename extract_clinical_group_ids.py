@@ -5,6 +5,11 @@ Extract ORPHA IDs that have DisorderType "Clinical group" from ORPHApacket JSON
 Outputs:
 - clinical_group_orpha_ids.csv (columns: ORPHAcode, Label)
 
+Only the packet header is read, so the rest of a file is not checked:
+a truncated or otherwise invalid packet is still listed as long as its
+header is intact. scan_all.py parses every file in full and skips such
+packets with a warning.
+
 Usage:
   python extract_clinical_group_ids.py [json_directory]
 
@@ -12,58 +17,96 @@ Default json_directory is "json" relative to repo root.
 """
 
 import sys
-import os
-import glob
-import json
 import csv
+import re
+from operator import itemgetter
+
+from packet_scan import HEAD_SIZE, decode_header, find_disorder_type, json_string, list_packets, scan_packets
+
+
+# Byte-level patterns for the top-level ORPHAcode and Label; avoids decoding the whole packet.
+# ORPHAcode is matched only as a number, quoted or bare; anything else (e.g. null)
+# is left to the full decode
+_ORPHA_RE = re.compile(rb'"ORPHAcode"\s*:\s*("?)(\d+)\1\s*[,}]')
+_LABEL_RE = re.compile(rb'"Label"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _scan(buf):
+    """Return (DisorderType, ORPHAcode, Label) from a raw packet buffer, or None if not found."""
+    m = find_disorder_type(buf)
+    if m is None:
+        return None
+    disorder_type = json_string(m.group(1))
+    if disorder_type != "Clinical group":
+        # Most packets are rejected here, without looking any further
+        return disorder_type, None, None
+    # The top-level ORPHAcode/Label precede DisorderType; nested ones come after it
+    code = _ORPHA_RE.search(buf, 0, m.start())
+    label = _LABEL_RE.search(buf, 0, m.start())
+    if code is None or label is None:
+        return None
+    return (
+        disorder_type,
+        code.group(2).decode("ascii"),
+        json_string(label.group(1)),
+    )
+
+
+def _process(path: str, buf):
+    """Return (ORPHAcode, Label) if the mapped packet is a 'Clinical group', else None."""
+    fields = _scan(buf)
+    if fields is None:
+        # Unexpected layout: fall back to decoding the packet
+        fields = decode_header(buf)
+    return clinical_group_hit(*fields)
+
+
+def clinical_group_hit(disorder_type, orpha_code, label):
+    """Return (ORPHAcode, Label) for a 'Clinical group' packet with both fields set, else None."""
+    if disorder_type == "Clinical group" and orpha_code and label:
+        return orpha_code, label
+    return None
+
+
+def clinical_group_entry(orpha_code, label) -> dict:
+    """Build one output row for write_csv."""
+    return {
+        "ORPHAcode": f"Orphanet:{orpha_code}",
+        "Label": label
+    }
 
 
 def extract_clinical_group_ids(json_directory: str) -> list:
     """Extract ORPHA IDs and labels for entries with DisorderType 'Clinical group'."""
-    json_pattern = os.path.join(json_directory, "ORPHApacket_*.json")
     clinical_group_entries = []
 
-    files = glob.glob(json_pattern)
+    files = list_packets(json_directory)
     total = len(files)
     processed = 0
 
-    for path in files:
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            orphapacket = data.get("Orphapacket", {})
-            disorder_type = orphapacket.get("DisorderType", {}).get("value")
-            
-            if disorder_type == "Clinical group":
-                orpha_code = orphapacket.get("ORPHAcode")
-                label = orphapacket.get("Label")
-                
-                if orpha_code and label:
-                    clinical_group_entries.append({
-                        "ORPHAcode": f"Orphanet:{orpha_code}",
-                        "Label": label
-                    })
-            
-            processed += 1
-            if processed % 2000 == 0:
-                print(f"Processed {processed}/{total} files...")
-                
-        except Exception as exc:
-            print(f"Warning: failed to parse {path}: {exc}")
+    for hit in scan_packets(_process, files, readahead=HEAD_SIZE):
+        if hit is not None:
+            clinical_group_entries.append(clinical_group_entry(*hit))
+        
+        processed += 1
+        if processed % 2000 == 0:
+            print(f"Processed {processed}/{total} files...")
 
     return clinical_group_entries
 
 
 def write_csv(entries: list, csv_path: str) -> None:
     """Write the clinical group entries to a CSV file."""
+    # Sort by ORPHAcode for consistent output; the numeric part is
+    # coerced once per entry so comparisons are plain int compares.
+    # Done before opening the file so a bad code cannot truncate it.
+    keyed = [(int(entry["ORPHAcode"][len("Orphanet:"):]), entry) for entry in entries]
+    keyed.sort(key=itemgetter(0))
+
     with open(csv_path, "w", encoding="utf-8", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=["ORPHAcode", "Label"])
         writer.writeheader()
-        
-        # Sort by ORPHAcode for consistent output (extract numeric part for sorting)
-        sorted_entries = sorted(entries, key=lambda x: int(x["ORPHAcode"].replace("Orphanet:", "")))
-        writer.writerows(sorted_entries)
+        writer.writerows(entry for _, entry in keyed)
 
 
 def main() -> None:
@@ -6,6 +6,11 @@ Outputs:
 - disorder_type_counts.csv (columns: DisorderType_Value, Count)
 - disorder_type_counts.md (markdown table)
 
+Only the packet header is read, so the rest of a file is not checked:
+a truncated or otherwise invalid packet is still counted as long as its
+header is intact. scan_all.py parses every file in full and skips such
+packets with a warning.
+
 Usage:
   python make_disorder_type_counts.py [json_directory]
 
@@ -13,62 +18,54 @@ Default json_directory is "json" relative to repo root.
 """
 
 import sys
-import os
-import glob
-import json
 from collections import Counter
 
+from packet_scan import HEAD_SIZE, decode_header, find_disorder_type, json_string, list_packets, scan_packets
+
+
+def _process(path: str, buf):
+    """Return the DisorderType value of one mapped packet, or None."""
+    m = find_disorder_type(buf)
+    if m is not None:
+        return json_string(m.group(1))
+    # Unexpected layout: fall back to decoding the packet
+    return decode_header(buf)[0]
+
 
 def collect_disorder_type_counts(json_directory: str) -> Counter:
-    json_pattern = os.path.join(json_directory, "ORPHApacket_*.json")
-    counts: Counter = Counter()
+    counts: dict = {}
 
-    files = glob.glob(json_pattern)
+    files = list_packets(json_directory)
     total = len(files)
     processed = 0
 
-    for path in files:
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            disorder_type = (
-                data.get("Orphapacket", {})
-                .get("DisorderType", {})
-                .get("value")
-            )
-            if disorder_type:
-                counts[disorder_type] += 1
-            processed += 1
-            if processed % 2000 == 0:
-                print(f"Processed {processed}/{total} files...")
-        except Exception as exc:
-            print(f"Warning: failed to parse {path}: {exc}")
-
-    return counts
+    for disorder_type in scan_packets(_process, files, readahead=HEAD_SIZE):
+        if disorder_type:
+            counts[disorder_type] = counts.get(disorder_type, 0) + 1
+        processed += 1
+        if processed % 2000 == 0:
+            print(f"Processed {processed}/{total} files...")
+
+    return Counter(counts)
 
 
 def write_csv(counts: Counter, csv_path: str) -> None:
-    lines = ["DisorderType_Value,Count"]
-    for value, count in counts.most_common():
-        # Escape commas in value by quoting if necessary
-        if "," in value:
-            safe_value = '"' + value.replace('"', '""') + '"'
-        else:
-            safe_value = value
-        lines.append(f"{safe_value},{count}")
     with open(csv_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines) + "\n")
+        f.write("DisorderType_Value,Count\n")
+        for value, count in counts.most_common():
+            # Escape commas in value by quoting if necessary
+            if "," in value:
+                safe_value = '"' + value.replace('"', '""') + '"'
+            else:
+                safe_value = value
+            f.write(f"{safe_value},{count}\n")
 
 
 def write_markdown(counts: Counter, md_path: str) -> None:
-    lines = [
-        "| DisorderType Value | Count |",
-        "|---|---:",
-    ]
-    for value, count in counts.most_common():
-        lines.append(f"| {value} | {count} |")
     with open(md_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines) + "\n")
+        f.write("| DisorderType Value | Count |\n|---|---:\n")
+        for value, count in counts.most_common():
+            f.write(f"| {value} | {count} |\n")
 
 
 def main() -> None:
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for scanning ORPHApacket JSON files.
+
+Used by analyze_json_structure.py, make_disorder_type_counts.py,
+extract_clinical_group_ids.py and scan_all.py:
+- list_packets: find the ORPHApacket_*.json files in a directory
+- scan_packets: run a per-file function over memory-mapped packets in a
+  process pool
+- find_disorder_type / json_string: byte-level header lookups
+- decode_header: decode just DisorderType, ORPHAcode and Label
+"""
+
+import gc
+import os
+import mmap
+import multiprocessing
+import re
+from functools import partial
+from typing import Any, Optional
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # e.g. on PyPy, which orjson does not support
+    import json
+
+    def loads(buf):
+        return json.loads(bytes(buf))
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+# Files per pool task
+BATCH_SIZE = 64
+
+# Byte-level pattern for Orphapacket.DisorderType.value; avoids decoding the whole packet.
+DT_RE = re.compile(rb'"DisorderType"\s*:\s*\{[^}]*?"value"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# DisorderType sits in the packet header, well within the first page
+HEAD_SIZE = 4096
+
+
+def json_string(raw: bytes) -> str:
+    """Decode the body of a JSON string literal (handles escapes)."""
+    return loads(b'"' + raw + b'"')
+
+
+def find_disorder_type(buf):
+    """Return the DT_RE match for a raw packet buffer, or None."""
+    # Only the header is normally touched; the rest is searched if it is not there
+    return DT_RE.search(buf, 0, HEAD_SIZE) or DT_RE.search(buf)
+
+
+if msgspec is not None:
+    # Only the fields we need; msgspec skips every other key without
+    # building Python objects for it. They are typed Any so an odd value
+    # in one field never rejects the packet, just as with a full parse.
+    class _Header(msgspec.Struct):
+        ORPHAcode: Any = None
+        Label: Any = None
+        DisorderType: Any = None
+
+    class _Packet(msgspec.Struct):
+        Orphapacket: Optional[_Header] = None
+
+    _header_decoder = msgspec.json.Decoder(_Packet)
+else:
+    _header_decoder = None
+
+
+def decode_header(buf) -> tuple:
+    """Return (DisorderType, ORPHAcode, Label) of a raw packet buffer by decoding it.
+
+    Uses a msgspec field-subset decoder when msgspec is installed, else a full parse.
+    """
+    with memoryview(buf) as view:
+        if _header_decoder is not None:
+            packet = _header_decoder.decode(view).Orphapacket
+            if packet is None:
+                return None, None, None
+            disorder_type, orpha_code, label = packet.DisorderType, packet.ORPHAcode, packet.Label
+        else:
+            orphapacket = loads(view).get("Orphapacket")
+            if orphapacket is None:
+                return None, None, None
+            disorder_type = orphapacket.get("DisorderType")
+            orpha_code = orphapacket.get("ORPHAcode")
+            label = orphapacket.get("Label")
+    if isinstance(disorder_type, dict):
+        return disorder_type.get("value"), orpha_code, label
+    return None, orpha_code, label
+
+
+def list_packets(json_directory: str) -> list:
+    """Return the paths of the ORPHApacket_*.json files in json_directory."""
+    try:
+        with os.scandir(json_directory) as entries:
+            return [
+                entry.path for entry in entries
+                if entry.name.startswith("ORPHApacket_")
+                and entry.name.endswith(".json")
+                and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def map_file(path: str, readahead=None) -> mmap.mmap:
+    """Memory-map one file read-only and ask the kernel to start reading it in.
+
+    readahead limits the hint to the first readahead bytes (whole file if None).
+    """
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_WILLNEED") and hasattr(buf, "madvise"):
+        length = len(buf) if readahead is None else min(len(buf), readahead)
+        buf.madvise(mmap.MADV_WILLNEED, 0, length)
+    return buf
+
+
+def _process_batch(process, readahead, paths: list) -> list:
+    """Worker: run process(path, buf) over a batch of memory-mapped files.
+
+    Files that cannot be read or parsed are reported and left out.
+    """
+    results = []
+    for path in paths:
+        try:
+            with map_file(path, readahead) as buf:
+                results.append(process(path, buf))
+        except Exception as exc:
+            print(f"Warning: failed to parse {path}: {exc}")
+    return results
+
+
+def scan_packets(process, files: list, readahead=None):
+    """Yield process(path, buf) for every file that could be read and parsed.
+
+    process must be a module-level function so it can be sent to the pool.
+    Results arrive in the order of files, so identical input gives identical output.
+    """
+    batches = [files[i:i + BATCH_SIZE] for i in range(0, len(files), BATCH_SIZE)]
+    worker = partial(_process_batch, process, readahead)
+
+    # The parsed documents and digests are acyclic and freed by refcounting;
+    # running the cyclic GC over them thousands of times is wasted work
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with multiprocessing.Pool(os.cpu_count(), initializer=gc.disable) as pool:
+            for results in pool.imap(worker, batches):
+                yield from results
+    finally:
+        if gc_was_enabled:
+            gc.enable()
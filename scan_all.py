@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Produce the outputs of all three scripts from a single pass over the
+ORPHApacket JSON files, parsing each file once.
+
+Outputs:
+- json_structure_analysis.csv, json_structure_summary.csv (see analyze_json_structure.py)
+- disorder_type_counts.csv, disorder_type_counts.md (see make_disorder_type_counts.py)
+- clinical_group_orpha_ids.csv (see extract_clinical_group_ids.py)
+
+DisorderType, ORPHAcode and Label are read with the standalone scripts'
+own header scanners, so every valid packet gives the same rows. Unlike
+those scripts, a packet that does not parse in full is skipped here.
+
+Usage:
+  python scan_all.py [json_directory]
+
+Default json_directory is "json" relative to repo root.
+"""
+
+import sys
+from collections import Counter
+
+import analyze_json_structure
+import extract_clinical_group_ids
+import make_disorder_type_counts
+from packet_scan import list_packets, loads, scan_packets
+
+
+def _analyze(path: str, buf):
+    """Return (structure digest, DisorderType value, clinical group hit or None) for one packet."""
+    with memoryview(buf) as view:
+        data = loads(view)
+
+    disorder_type = make_disorder_type_counts._process(path, buf)
+    hit = extract_clinical_group_ids._process(path, buf)
+    return analyze_json_structure.digest_packet(path, data), disorder_type, hit
+
+
+def main() -> None:
+    json_directory = sys.argv[1] if len(sys.argv) > 1 else "json"
+    print(f"Scanning JSON files in: {json_directory}")
+
+    files = list_packets(json_directory)
+    total = len(files)
+    if not files:
+        print("No ORPHApacket JSON files found.")
+        sys.exit(1)
+
+    stats = analyze_json_structure.new_structure_stats()
+    counts: dict = {}
+    clinical_group_entries = []
+    processed = 0
+
+    for result in scan_packets(_analyze, files):
+        digest, disorder_type, hit = result
+
+        analyze_json_structure.merge_digest(stats, digest)
+        if disorder_type:
+            counts[disorder_type] = counts.get(disorder_type, 0) + 1
+        if hit is not None:
+            clinical_group_entries.append(extract_clinical_group_ids.clinical_group_entry(*hit))
+
+        processed += 1
+        if processed % 2000 == 0:
+            print(f"Processed {processed}/{total} files...")
+
+    analyze_json_structure.write_structure_outputs(
+        analyze_json_structure.structure_results(stats, processed)
+    )
+
+    # Like the standalone scripts, never overwrite a table with an empty one
+    missing = False
+    generated = []
+
+    if counts:
+        counts = Counter(counts)
+        make_disorder_type_counts.write_csv(counts, "disorder_type_counts.csv")
+        make_disorder_type_counts.write_markdown(counts, "disorder_type_counts.md")
+        generated += ["disorder_type_counts.csv", "disorder_type_counts.md"]
+    else:
+        print("No DisorderType values found.")
+        missing = True
+
+    if clinical_group_entries:
+        extract_clinical_group_ids.write_csv(clinical_group_entries, "clinical_group_orpha_ids.csv")
+        generated.append(
+            f"clinical_group_orpha_ids.csv ({len(clinical_group_entries)} Clinical group entries)"
+        )
+    else:
+        print("No Clinical group entries found.")
+        missing = True
+
+    if generated:
+        print("\nGenerated files:")
+        for name in generated:
+            print(f" - {name}")
+
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()